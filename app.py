@@ -2,7 +2,6 @@ import streamlit as st
 import pandas as pd
 import math
 import time
-from datetime import datetime
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="Universal Lab Assistant", page_icon="🧪", layout="wide")
@@ -41,8 +40,13 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- INITIALIZE SESSION STATE ---
-if 'logbook' not in st.session_state:
-    st.session_state.logbook = pd.DataFrame(columns=["Timestamp", "Module", "Result", "User_Note"])
+LOG_COLUMNS = ["Timestamp", "Module", "Result", "User_Note"]
+
+if 'logbook_rows' not in st.session_state:
+    st.session_state.logbook_rows = []
+    st.session_state.pending_rows = []  # New entries, moved into logbook_rows by flush_log()
+    st.session_state.logbook_version = 0  # Bumped whenever logbook_rows changes
+    st.session_state.logbook_csv_cache = (None, b"")
 
 if 'timer_running' not in st.session_state:
     st.session_state.timer_running = False
@@ -57,13 +61,73 @@ if 'user_email' not in st.session_state:
     st.session_state.user_email = None
 
 MAX_FREE_CALCULATIONS = 10  # Limit for free tier
+STATIC_TABLE_TTL = 24 * 60 * 60  # Refresh cached reference tables daily
+MAX_CHART_POINTS = 5000  # Long traces are thinned to this many points before plotting
+RCF_CONSTANT = 1.118e-5  # RCF = 1.118e-5 × radius (cm) × RPM²
+
+MENU_OPTIONS = [
+    "🧪 Dashboard Home", 
+    "🧬 Biochemistry (C1V1)", 
+    "🧫 Microbiology & Graphs", 
+    "🔬 Tissue Culture", 
+    "🕵️ Forensics (DNA)", 
+    "🧪 Master Mix Generator", 
+    "🔄 Unit Converter", 
+    "🌀 Centrifuge (RPM/G)", 
+    "⏱️ Lab Timers", 
+    "📋 Protocol Templates",
+    "📊 View Daily Log",
+    "💰 Lab Budget & Prices",
+]
 
 def add_to_log(module, result, note=""):
     """Add entry to session logbook"""
+    from datetime import datetime
+    
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    new_entry = pd.DataFrame([[now, module, result, note]], 
-                             columns=["Timestamp", "Module", "Result", "User_Note"])
-    st.session_state.logbook = pd.concat([st.session_state.logbook, new_entry], ignore_index=True)
+    st.session_state.pending_rows.append(
+        {"Timestamp": now, "Module": module, "Result": result, "User_Note": note})
+
+def flush_log():
+    """Move buffered entries into the session logbook"""
+    if st.session_state.pending_rows:
+        st.session_state.logbook_rows.extend(st.session_state.pending_rows)
+        st.session_state.pending_rows.clear()
+        st.session_state.logbook_version += 1
+
+def log_size():
+    """Number of logged entries, including ones not yet flushed"""
+    return len(st.session_state.logbook_rows) + len(st.session_state.pending_rows)
+
+def logbook_csv():
+    """Serialize the session logbook to CSV bytes, reusing the last export if unchanged"""
+    version, data = st.session_state.logbook_csv_cache
+    if version == st.session_state.logbook_version:
+        return data
+    import csv
+    import io
+    
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(LOG_COLUMNS)
+    for row in st.session_state.logbook_rows:
+        writer.writerow([row[col] for col in LOG_COLUMNS])
+    data = buf.getvalue().encode('utf-8')
+    st.session_state.logbook_csv_cache = (st.session_state.logbook_version, data)
+    return data
+
+def parse_float_list(text):
+    """Parse comma- or newline-separated numbers into a list of floats"""
+    return [float(x) for x in text.replace('\n', ',').split(',') if x.strip()]
+
+def downsample_series(xs, ys, max_points=MAX_CHART_POINTS):
+    """Thin a series to at most max_points by striding, keeping the last point"""
+    if len(xs) <= max_points:
+        return xs, ys
+    # n - 1 gaps shared by max_points - 1 strides, so the appended last point still fits
+    stride = math.ceil((len(xs) - 1) / (max_points - 1))
+    idx = list(range(0, len(xs) - 1, stride)) + [len(xs) - 1]
+    return [xs[i] for i in idx], [ys[i] for i in idx]
 
 def check_usage_limit():
     """Track and enforce free tier limits"""
@@ -74,6 +138,42 @@ def check_usage_limit():
         return False
     return True
 
+# --- STATIC REFERENCE TABLES ---
+@st.cache_data(ttl=STATIC_TABLE_TTL)
+def load_growth_reference():
+    """Reference doubling times for common lab organisms"""
+    return pd.DataFrame({
+        "Organism": ["E. coli", "S. aureus", "B. subtilis", "P. aeruginosa", "S. cerevisiae"],
+        "Doubling Time (min)": [20, 30, 120, 40, 90],
+        "Optimal Temp (°C)": [37, 37, 30, 37, 30],
+        "Typical Max OD600": [2.0, 3.0, 2.5, 4.0, 1.5]
+    })
+
+@st.cache_data(ttl=STATIC_TABLE_TTL)
+def load_budget_tables():
+    """Reference reagent prices, grouped by category"""
+    return {
+        "Molecular Biology": pd.DataFrame({
+            "Reagent": ["Taq Polymerase", "dNTPs Mix", "SYBR Green Mix", 
+                       "Restriction Enzyme", "T4 DNA Ligase", "DNA Ladder"],
+            "Price": ["$0.50/rxn", "$0.30/rxn", "$1.00/rxn", 
+                     "$0.80/rxn", "$0.60/rxn", "$2.00/lane"],
+            "Supplier Example": ["NEB", "Thermo", "Bio-Rad", "NEB", "NEB", "Invitrogen"]
+        }),
+        "Cell Culture": pd.DataFrame({
+            "Reagent": ["DMEM (500mL)", "FBS (500mL)", "Trypsin-EDTA (100mL)",
+                       "Pen/Strep (100mL)", "PBS (500mL)", "DMSO (50mL)"],
+            "Price": ["$25", "$250", "$35", "$15", "$10", "$40"],
+            "Supplier Example": ["Gibco", "Sigma", "Gibco", "Gibco", "Lonza", "Sigma"]
+        }),
+        "General Lab": pd.DataFrame({
+            "Reagent": ["Ethanol (1L)", "Isopropanol (1L)", "Agarose (100g)",
+                       "TEMED (25mL)", "APS (25g)", "Tris Base (500g)"],
+            "Price": ["$30", "$25", "$80", "$15", "$10", "$45"],
+            "Supplier Example": ["Fisher", "Fisher", "Bio-Rad", "Bio-Rad", "Sigma", "Sigma"]
+        })
+    }
+
 # --- SIDEBAR NAVIGATION ---
 with st.sidebar:
     st.markdown("## 🧪 Lab Navigation")
@@ -98,19 +198,7 @@ with st.sidebar:
     
     st.markdown("---")
     
-    menu = st.selectbox("Select Module:", 
-        ["🧪 Dashboard Home", 
-         "🧬 Biochemistry (C1V1)", 
-         "🧫 Microbiology & Graphs", 
-         "🔬 Tissue Culture", 
-         "🕵️ Forensics (DNA)", 
-         "🧪 Master Mix Generator", 
-         "🔄 Unit Converter", 
-         "🌀 Centrifuge (RPM/G)", 
-         "⏱️ Lab Timers", 
-         "📋 Protocol Templates",
-         "📊 View Daily Log",
-         "💰 Lab Budget & Prices"])
+    menu = st.selectbox("Select Module:", MENU_OPTIONS)
     
     st.markdown("---")
     
@@ -135,9 +223,9 @@ if "Dashboard Home" in menu:
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("📊 Calculations", len(st.session_state.logbook))
+        st.metric("📊 Calculations", log_size())
     with col2:
-        st.metric("🧪 Modules", "12")
+        st.metric("🧪 Modules", len(MENU_OPTIONS))
     with col3:
         st.metric("☁️ Status", "Online")
     with col4:
@@ -246,7 +334,7 @@ elif "Microbiology" in menu:
                     st.stop()
                 
                 try:
-                    n_gen = (math.log10(nt) - math.log10(n0)) / math.log10(2)
+                    n_gen = math.log2(nt / n0)
                     gen_time = t_elapsed / n_gen
                     growth_rate = 1 / gen_time if gen_time > 0 else 0
                     
@@ -259,7 +347,7 @@ elif "Microbiology" in menu:
                     add_to_log("Microbiology Growth", 
                               f"Doubling time: {gen_time:.1f} min", note)
                     
-                except Exception as e:
+                except (ValueError, ZeroDivisionError) as e:
                     st.error(f"⚠️ Calculation error: {str(e)}")
     
     with tab2:
@@ -269,49 +357,49 @@ elif "Microbiology" in menu:
         **Enter your time points and OD600 readings:**
         """)
         
-        col1, col2 = st.columns(2)
-        with col1:
-            times = st.text_area("Time Points (min)", "0, 30, 60, 90, 120, 150, 180", 
-                               help="One value per line or comma-separated")
-        with col2:
-            readings = st.text_area("OD600 Readings", "0.05, 0.08, 0.15, 0.35, 0.65, 0.95, 1.10",
-                                  help="Must match number of time points")
+        # Inside a form, editing the data does not rerun the page; the chart
+        # is only rebuilt when the user submits
+        with st.form("growth_curve_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                times = st.text_area("Time Points (min)", "0, 30, 60, 90, 120, 150, 180", 
+                                   help="One value per line or comma-separated")
+            with col2:
+                readings = st.text_area("OD600 Readings", "0.05, 0.08, 0.15, 0.35, 0.65, 0.95, 1.10",
+                                      help="Must match number of time points")
+            
+            plot_submitted = st.form_submit_button("📈 Plot Growth Curve")
         
-        if st.button("📈 Plot Growth Curve"):
+        if plot_submitted:
             try:
-                t_list = [float(x.strip()) for x in times.replace('\n', ',').split(",") if x.strip()]
-                r_list = [float(x.strip()) for x in readings.replace('\n', ',').split(",") if x.strip()]
+                t_list = parse_float_list(times)
+                r_list = parse_float_list(readings)
                 
                 if len(t_list) != len(r_list):
                     st.error(f"❌ Mismatch: {len(t_list)} time points vs {len(r_list)} readings")
                 elif len(t_list) < 2:
                     st.error("❌ Need at least 2 data points")
                 else:
-                    chart_df = pd.DataFrame({"OD600": r_list}, index=t_list)
-                    st.line_chart(chart_df, use_container_width=True)
+                    plot_t, plot_r = downsample_series(t_list, r_list)
+                    st.line_chart({"Time (min)": plot_t, "OD600": plot_r},
+                                  x="Time (min)", y="OD600", use_container_width=True)
+                    if len(plot_t) < len(t_list):
+                        st.caption(f"Showing {len(plot_t)} of {len(t_list)} points")
                     
                     # Calculate growth phase
                     st.markdown("### 📈 Growth Analysis")
                     if len(r_list) > 2:
-                        max_growth_idx = r_list.index(max(r_list))
-                        st.info(f"🔍 **Max OD600:** {max(r_list):.3f} at t={t_list[max_growth_idx]} min")
+                        max_growth_idx = max(range(len(r_list)), key=r_list.__getitem__)
+                        st.info(f"🔍 **Max OD600:** {r_list[max_growth_idx]:.3f} at t={t_list[max_growth_idx]} min")
                         
                     add_to_log("Growth Curve", f"{len(t_list)} points plotted")
                     
             except ValueError:
                 st.error("❌ Please enter valid numbers only")
-            except Exception as e:
-                st.error(f"⚠️ Error: {str(e)}")
     
     with tab3:
         st.markdown("### 📚 Reference Values")
-        ref_data = pd.DataFrame({
-            "Organism": ["E. coli", "S. aureus", "B. subtilis", "P. aeruginosa", "S. cerevisiae"],
-            "Doubling Time (min)": [20, 30, 120, 40, 90],
-            "Optimal Temp (°C)": [37, 37, 30, 37, 30],
-            "Typical Max OD600": [2.0, 3.0, 2.5, 4.0, 1.5]
-        })
-        st.dataframe(ref_data, use_container_width=True, hide_index=True)
+        st.dataframe(load_growth_reference(), use_container_width=True, hide_index=True)
 
 # --- 4. TISSUE CULTURE ---
 elif "Tissue Culture" in menu:
@@ -439,14 +527,15 @@ elif "Master Mix" in menu:
             if not check_usage_limit():
                 st.stop()
             
-            components = {
-                "Water": water * total_rxns,
-                "Buffer": buffer * total_rxns,
-                "dNTPs": dntps * total_rxns,
-                "Forward Primer": primers_f * total_rxns,
-                "Reverse Primer": primers_r * total_rxns,
-                "Polymerase": enzyme * total_rxns
+            per_rxn = {
+                "Water": water,
+                "Buffer": buffer,
+                "dNTPs": dntps,
+                "Forward Primer": primers_f,
+                "Reverse Primer": primers_r,
+                "Polymerase": enzyme
             }
+            components = {name: vol * total_rxns for name, vol in per_rxn.items()}
             
             total_vol = sum(components.values())
             
@@ -454,10 +543,10 @@ elif "Master Mix" in menu:
             
             # Create a nice table
             df_mix = pd.DataFrame({
-                "Component": list(components.keys()),
-                "Per Rxn (µL)": [water, buffer, dntps, primers_f, primers_r, enzyme],
+                "Component": list(per_rxn.keys()),
+                "Per Rxn (µL)": list(per_rxn.values()),
                 f"×{total_rxns} Rxns (µL)": list(components.values()),
-                "Check (✓)": [""] * 6
+                "Check (✓)": [""] * len(per_rxn)
             })
             st.dataframe(df_mix, use_container_width=True, hide_index=True)
             
@@ -527,7 +616,7 @@ elif "Centrifuge" in menu:
             rpm = st.number_input("Speed (RPM)", value=5000, min_value=100)
             
             if st.form_submit_button("🌀 Convert to RCF"):
-                rcf = 0.00001118 * radius * (rpm ** 2)
+                rcf = RCF_CONSTANT * radius * rpm * rpm
                 st.metric("RCF (× g)", f"{rcf:.0f}")
                 
                 # Common applications
@@ -546,7 +635,7 @@ elif "Centrifuge" in menu:
             rcf_target = st.number_input("Desired RCF (× g)", value=5000, min_value=1)
             
             if st.form_submit_button("🌀 Convert to RPM"):
-                rpm_needed = math.sqrt(rcf_target / (0.00001118 * radius2))
+                rpm_needed = math.sqrt(rcf_target / (RCF_CONSTANT * radius2))
                 st.metric("Required RPM", f"{rpm_needed:.0f}")
                 add_to_log("Centrifuge", f"{rcf_target}g = {rpm_needed:.0f} RPM at {radius2}cm")
 
@@ -583,7 +672,7 @@ elif "Lab Timers" in menu:
     with col_btn1:
         if st.button("▶️ Start", use_container_width=True) and not st.session_state.timer_running:
             st.session_state.timer_running = True
-            st.session_state.timer_end = time.time() + (mins * 60)
+            st.session_state.timer_end = time.monotonic() + (mins * 60)
             st.session_state.timer_task = task
             st.session_state.timer_duration = mins
             st.rerun()
@@ -599,9 +688,19 @@ elif "Lab Timers" in menu:
             st.session_state.timer_task = ""
             st.rerun()
     
-    # Timer display
-    if st.session_state.timer_end:
-        remaining = max(0, st.session_state.timer_end - time.time())
+    # Completion notice from the last tick of the countdown
+    finished = st.session_state.pop("timer_finished", None)
+    if finished:
+        st.balloons()
+        st.success(f"🔔 **{finished} Complete!**")
+    
+    # Timer display: only this fragment reruns while the countdown is live,
+    # so the script never sleeps on the server thread.
+    @st.fragment(run_every=1 if st.session_state.timer_running else None)
+    def timer_display():
+        if not st.session_state.timer_end:
+            return
+        remaining = max(0, st.session_state.timer_end - time.monotonic())
         
         if st.session_state.timer_running and remaining > 0:
             mins_rem = int(remaining // 60)
@@ -622,16 +721,15 @@ elif "Lab Timers" in menu:
             </div>
             """, unsafe_allow_html=True)
             
-            # Auto-refresh
-            time.sleep(1)
-            st.rerun()
-            
-        elif remaining <= 0 and st.session_state.timer_end:
-            st.balloons()
-            st.success(f"🔔 **{st.session_state.timer_task} Complete!**")
+        elif remaining <= 0:
             add_to_log("Timer", f"{st.session_state.timer_task} finished ({st.session_state.timer_duration} min)")
+            st.session_state.timer_finished = st.session_state.timer_task
             st.session_state.timer_running = False
             st.session_state.timer_end = None
+            # Full rerun so the fragment stops ticking and the notice shows
+            st.rerun()
+    
+    timer_display()
 
 # --- 10. PROTOCOL TEMPLATES (NEW PREMIUM FEATURE) ---
 elif "Protocol Templates" in menu:
@@ -721,8 +819,8 @@ elif "Protocol Templates" in menu:
             with st.expander(f"📄 {protocol_name}"):
                 if "components" in details:
                     st.markdown("**Components:**")
-                    comp_df = pd.DataFrame(details["components"].items(), 
-                                          columns=["Component", "Amount"])
+                    comp_df = pd.DataFrame.from_records(list(details["components"].items()), 
+                                                        columns=["Component", "Amount"])
                     st.dataframe(comp_df, hide_index=True, use_container_width=True)
                 
                 if "cycling" in details:
@@ -751,35 +849,37 @@ elif "Protocol Templates" in menu:
 # --- 11. VIEW DAILY LOG ---
 elif "View Daily Log" in menu:
     st.markdown("## 📊 Session Logbook")
+    flush_log()
     
-    if st.session_state.logbook.empty:
+    if not st.session_state.logbook_rows:
         st.info("📝 No calculations logged yet. Start using the modules to build your log!")
     else:
+        logbook = pd.DataFrame.from_records(st.session_state.logbook_rows, columns=LOG_COLUMNS)
+        
         # Filter options
         col1, col2 = st.columns(2)
         with col1:
             module_filter = st.multiselect("Filter by Module", 
-                                         st.session_state.logbook["Module"].unique().tolist())
+                                         logbook["Module"].unique().tolist())
         with col2:
-            if st.button("📥 Export All as CSV"):
-                csv = st.session_state.logbook.to_csv(index=False).encode('utf-8')
-                st.download_button("⬇️ Download CSV", csv, "lab_session_log.csv", 
-                                 "text/csv", key="download_log")
+            st.download_button("📥 Export All as CSV", logbook_csv(), "lab_session_log.csv", 
+                             "text/csv", key="download_log")
         
         # Display filtered log
         if module_filter:
-            filtered = st.session_state.logbook[st.session_state.logbook["Module"].isin(module_filter)]
+            filtered = logbook[logbook["Module"].isin(module_filter)]
         else:
-            filtered = st.session_state.logbook
+            filtered = logbook
         
         st.dataframe(filtered, use_container_width=True, hide_index=True)
         
         # Stats
-        st.markdown(f"**Total entries:** {len(st.session_state.logbook)} | "
-                   f"**Modules used:** {st.session_state.logbook['Module'].nunique()}")
+        st.markdown(f"**Total entries:** {len(logbook)} | "
+                   f"**Modules used:** {logbook['Module'].nunique()}")
         
         if st.button("🗑️ Clear Session Log", type="secondary"):
-            st.session_state.logbook = pd.DataFrame(columns=["Timestamp", "Module", "Result", "User_Note"])
+            st.session_state.logbook_rows.clear()
+            st.session_state.logbook_version += 1
             st.rerun()
 
 # --- 12. BUDGET & PRICES ---
@@ -787,27 +887,7 @@ elif "Budget" in menu:
     st.markdown("## 💰 Lab Reagent Reference Prices")
     st.caption("Approximate prices for budget planning. Actual costs may vary.")
     
-    budget_data = {
-        "Molecular Biology": pd.DataFrame({
-            "Reagent": ["Taq Polymerase", "dNTPs Mix", "SYBR Green Mix", 
-                       "Restriction Enzyme", "T4 DNA Ligase", "DNA Ladder"],
-            "Price": ["$0.50/rxn", "$0.30/rxn", "$1.00/rxn", 
-                     "$0.80/rxn", "$0.60/rxn", "$2.00/lane"],
-            "Supplier Example": ["NEB", "Thermo", "Bio-Rad", "NEB", "NEB", "Invitrogen"]
-        }),
-        "Cell Culture": pd.DataFrame({
-            "Reagent": ["DMEM (500mL)", "FBS (500mL)", "Trypsin-EDTA (100mL)",
-                       "Pen/Strep (100mL)", "PBS (500mL)", "DMSO (50mL)"],
-            "Price": ["$25", "$250", "$35", "$15", "$10", "$40"],
-            "Supplier Example": ["Gibco", "Sigma", "Gibco", "Gibco", "Lonza", "Sigma"]
-        }),
-        "General Lab": pd.DataFrame({
-            "Reagent": ["Ethanol (1L)", "Isopropanol (1L)", "Agarose (100g)",
-                       "TEMED (25mL)", "APS (25g)", "Tris Base (500g)"],
-            "Price": ["$30", "$25", "$80", "$15", "$10", "$45"],
-            "Supplier Example": ["Fisher", "Fisher", "Bio-Rad", "Bio-Rad", "Sigma", "Sigma"]
-        })
-    }
+    budget_data = load_budget_tables()
     
     tabs = st.tabs(list(budget_data.keys()))
     for tab, (category, df) in zip(tabs, budget_data.items()):
@@ -820,7 +900,7 @@ elif "Budget" in menu:
 
 # --- FOOTER ---
 st.sidebar.markdown("---")
-st.sidebar.caption(f"v2.0 | {len(st.session_state.logbook)} actions logged")
+st.sidebar.caption(f"v2.0 | {log_size()} actions logged")
 
 if st.session_state.free_calculations >= MAX_FREE_CALCULATIONS:
     st.sidebar.error("🛑 Free limit reached")
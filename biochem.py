@@ -1,94 +1,85 @@
 """Biochemistry module: molarity, mass, volume, and concentration conversions, serial dilutions."""
-from utils import validate_positive_number
+from functools import lru_cache
+
+from utils import normalize_unit, validate_positive_number
+
+# How many of each unit make up one base unit (M, g, L, ng/µL)
+_MOLARITY_PER_M = {'M': 1.0, 'mM': 1000.0}
+_MASS_PER_G = {'g': 1.0, 'mg': 1000.0}
+_VOLUME_PER_L = {'L': 1.0, 'mL': 1000.0, 'uL': 1_000_000.0}
+_CONC_PER_NG_UL = {'ng/uL': 1.0, 'ng/mL': 1000.0, 'pg/uL': 1000.0}
 
 
 def convert_molarity(value, from_unit, to_unit):
     """Convert between molar units (M, mM)."""
-    value = validate_positive_number(value)
-    
-    if from_unit == 'M':
-        value_in_molar = value
-    elif from_unit == 'mM':
-        value_in_molar = value / 1000
-    else:
+    return _convert_molarity(validate_positive_number(value), from_unit, to_unit)
+
+
+@lru_cache(maxsize=4096)
+def _convert_molarity(value, from_unit, to_unit):
+    try:
+        value_in_molar = value / _MOLARITY_PER_M[from_unit]
+    except KeyError:
         raise ValueError(f"Unknown molarity unit: {from_unit}")
-    
-    if to_unit == 'M':
-        return value_in_molar
-    elif to_unit == 'mM':
-        return value_in_molar * 1000
-    else:
+    try:
+        return value_in_molar * _MOLARITY_PER_M[to_unit]
+    except KeyError:
         raise ValueError(f"Unknown molarity unit: {to_unit}")
 
 
 def convert_mass(value, from_unit, to_unit):
     """Convert between mass units (g, mg)."""
-    value = validate_positive_number(value)
-    
-    if from_unit == 'g':
-        value_in_grams = value
-    elif from_unit == 'mg':
-        value_in_grams = value / 1000
-    else:
+    return _convert_mass(validate_positive_number(value), from_unit, to_unit)
+
+
+@lru_cache(maxsize=4096)
+def _convert_mass(value, from_unit, to_unit):
+    try:
+        value_in_grams = value / _MASS_PER_G[from_unit]
+    except KeyError:
         raise ValueError(f"Unknown mass unit: {from_unit}")
-    
-    if to_unit == 'g':
-        return value_in_grams
-    elif to_unit == 'mg':
-        return value_in_grams * 1000
-    else:
+    try:
+        return value_in_grams * _MASS_PER_G[to_unit]
+    except KeyError:
         raise ValueError(f"Unknown mass unit: {to_unit}")
 
 
 def convert_volume(value, from_unit, to_unit):
-    """Convert between volume units (L, µL)."""
+    """Convert between volume units (L, mL, µL)."""
     value = validate_positive_number(value)
-    
-    from_unit = from_unit.replace('µ', 'u')
-    to_unit = to_unit.replace('µ', 'u')
-    
-    if from_unit == 'L':
-        value_in_liters = value
-    elif from_unit == 'uL':
-        value_in_liters = value / 1_000_000
-    else:
+    # Normalize before the cached call so 'µL' and 'uL' share a cache entry
+    return _convert_volume(value, normalize_unit(from_unit), normalize_unit(to_unit))
+
+
+@lru_cache(maxsize=4096)
+def _convert_volume(value, from_unit, to_unit):
+    try:
+        value_in_liters = value / _VOLUME_PER_L[from_unit]
+    except KeyError:
         raise ValueError(f"Unknown volume unit: {from_unit}")
-    
-    if to_unit == 'L':
-        return value_in_liters
-    elif to_unit == 'uL':
-        return value_in_liters * 1_000_000
-    else:
+    try:
+        return value_in_liters * _VOLUME_PER_L[to_unit]
+    except KeyError:
         raise ValueError(f"Unknown volume unit: {to_unit}")
 
 
 def convert_concentration(value, from_unit, to_unit):
     """Convert between concentration units (ng/µL, ng/mL, pg/µL)."""
     val = validate_positive_number(value)
-    fu = from_unit.replace('µ', 'u')
-    tu = to_unit.replace('µ', 'u')
+    fu = normalize_unit(from_unit)
+    tu = normalize_unit(to_unit)
 
-    supported = {'ng/uL', 'ng/mL', 'pg/uL'}
-    if fu not in supported:
+    if fu not in _CONC_PER_NG_UL:
         raise ValueError(f"Unsupported from-unit: {from_unit}")
-    if tu not in supported:
+    if tu not in _CONC_PER_NG_UL:
         raise ValueError(f"Unsupported to-unit: {to_unit}")
 
-    # Convert to base unit ng/µL
-    if fu == 'ng/uL':
-        base = val
-    elif fu == 'ng/mL':
-        base = val / 1000.0
-    elif fu == 'pg/uL':
-        base = val / 1000.0
+    return _convert_concentration(val, fu, tu)
+
 
-    # Convert from base to target
-    if tu == 'ng/uL':
-        return base
-    elif tu == 'ng/mL':
-        return base * 1000.0
-    elif tu == 'pg/uL':
-        return base * 1000.0
+@lru_cache(maxsize=4096)
+def _convert_concentration(val, fu, tu):
+    return val / _CONC_PER_NG_UL[fu] * _CONC_PER_NG_UL[tu]
 
 
 def serial_dilution(starting_conc, dilution_factor, num_steps, final_volume, conc_unit='M', vol_unit='µL'):
@@ -108,9 +99,9 @@ def serial_dilution(starting_conc, dilution_factor, num_steps, final_volume, con
     sample_volume = final_volume / dilution_factor
     diluent_volume = final_volume - sample_volume
     
-    results = []
-    for step in range(1, num_steps + 1):
-        concentration = starting_conc / (dilution_factor ** step)
-        results.append((step, concentration, sample_volume, diluent_volume))
-    
+    results = [
+        (step, starting_conc / dilution_factor ** step, sample_volume, diluent_volume)
+        for step in range(1, num_steps + 1)
+    ]
+
     return results, starting_conc, sample_volume, diluent_volume, conc_unit, vol_unit
@@ -1,5 +1,5 @@
 """Forensics/Molecular module: DNA normalization."""
-from utils import validate_positive_number
+from utils import normalize_unit, validate_positive_number
 from storage import compute_cost_for_volume
 
 
@@ -55,7 +55,7 @@ def dna_normalization_calculator(current_conc, current_volume_ul, target_conc, c
     current_vol = validate_positive_number(current_volume_ul)
     target_conc = validate_positive_number(target_conc)
 
-    unit = conc_unit.replace('u', 'µ')
+    unit = normalize_unit(conc_unit)
 
     if unit.lower() == 'nm':
         if fragment_bp is None:
@@ -64,7 +64,7 @@ def dna_normalization_calculator(current_conc, current_volume_ul, target_conc, c
         mw = 660.0 * bp  # Molecular weight for dsDNA
         current_ng_per_ul = current_conc * mw * 1e-6
         target_ng_per_ul = target_conc * mw * 1e-6
-    elif unit in ('ng/µL', 'ng/uL', 'ng/μL'):
+    elif unit == 'ng/uL':
         current_ng_per_ul = current_conc
         target_ng_per_ul = target_conc
     else:
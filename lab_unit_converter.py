@@ -5,180 +5,205 @@ A comprehensive laboratory calculation tool for biochemistry, tissue culture,
 molecular biology, and microbiology.
 """
 
-from lib.menu import run_menu
+import os
+import re
+import sys
+from functools import partial
+from math import log2
+from uuid import uuid4
 
+from biochem import convert_concentration, convert_mass, convert_molarity, convert_volume
+from micro import generation_time_batch
+from utils import (append_json_lines, atomic_write, iter_json_lines, json_dumps, json_loads,
+                   normalize_unit, now_iso, validate_positive_number)
 
-if __name__ == "__main__":
-    run_menu()
+# JSON Lines history; override the location with LAB_HISTORY_FILE
+HISTORY_FILE = os.environ.get('LAB_HISTORY_FILE', os.path.expanduser('~/.lab_history.jsonl'))
 
+# key=value pairs for batch (non-TTY) input, e.g. "num_steps=5, vol_unit=mL"
+_KV_RE = re.compile(r'(\w+)\s*=\s*([^\s,]+)')
 
-def convert_molarity(value, from_unit, to_unit):
-    """
-    Convert between molar units.
-    
-    Args:
-        value: The value to convert
-        from_unit: Source unit ('M' for Molar, 'mM' for millimolar)
-        to_unit: Target unit ('M' for Molar, 'mM' for millimolar)
-        
-    Returns:
-        float: The converted value
-    """
-    value = validate_positive_number(value)
-    
-    # Convert to molar first
-    if from_unit == 'M':
-        value_in_molar = value
-    elif from_unit == 'mM':
-        value_in_molar = value / 1000
-    else:
-        raise ValueError(f"Unknown molarity unit: {from_unit}")
-    
-    # Convert from molar to target unit
-    if to_unit == 'M':
-        return value_in_molar
-    elif to_unit == 'mM':
-        return value_in_molar * 1000
-    else:
-        raise ValueError(f"Unknown molarity unit: {to_unit}")
+# Parsed history, keyed on (st_mtime_ns, st_size) of HISTORY_FILE;
+# 'patches' counts the update records folded into 'data'
+_HISTORY_CACHE = {'key': None, 'data': None, 'patches': 0}
 
+# Rewrite the history file once update records outnumber this share of entries
+_COMPACT_RATIO = 0.5
 
-if __name__ == "__main__":
-    run_menu()
 
+def _validate_positive_float(x):
+    """
+    Fast path of validate_positive_number for values that are already floats.
+
+    Calculators are often mapped over rows of numbers; this skips float()
+    parsing and its exception handling for those. Anything else (strings
+    from input(), ints, negatives) goes through the full validator, so
+    errors and messages are unchanged.
+    """
+    if type(x) is float and x >= 0:
+        return x
+    return validate_positive_number(x)
 
-# --- Old code below (deprecated) ---
 
-def convert_mass(value, from_unit, to_unit):
+def _read_params(fields):
     """
-    Convert between mass units.
-    
+    Read calculator inputs.
+
     Args:
-        value: The value to convert
-        from_unit: Source unit ('g' for grams, 'mg' for milligrams)
-        to_unit: Target unit ('g' for grams, 'mg' for milligrams)
-        
+        fields: List of (key, prompt, default) tuples. Prompts may reference
+            earlier keys, e.g. "Target concentration ({conc_unit}): ".
+
     Returns:
-        float: The converted value
+        dict: Raw string value for each key (default when left blank)
+
+    On a terminal each field is prompted for in turn. When stdin is
+    redirected, one line of key=value pairs is read instead, e.g.
+    ``starting_conc=1 dilution_factor=10 num_steps=5``.
     """
-    value = validate_positive_number(value)
-    
-    # Convert to grams first
-    if from_unit == 'g':
-        value_in_grams = value
-    elif from_unit == 'mg':
-        value_in_grams = value / 1000
-    else:
-        raise ValueError(f"Unknown mass unit: {from_unit}")
-    
-    # Convert from grams to target unit
-    if to_unit == 'g':
-        return value_in_grams
-    elif to_unit == 'mg':
-        return value_in_grams * 1000
-    else:
-        raise ValueError(f"Unknown mass unit: {to_unit}")
+    if sys.stdin.isatty():
+        params = {}
+        for key, prompt, default in fields:
+            params[key] = input(prompt.format(**params)).strip() or default
+        return params
+
+    params = dict(_KV_RE.findall(sys.stdin.readline()))
+    for key, _, default in fields:
+        if not params.get(key):
+            params[key] = default
+    return params
 
 
-def convert_volume(value, from_unit, to_unit):
+def load_history():
     """
-    Convert between volume units.
-    
-    Args:
-        value: The value to convert
-        from_unit: Source unit ('L' for liters, 'µL' or 'uL' for microliters)
-        to_unit: Target unit ('L' for liters, 'µL' or 'uL' for microliters)
-        
-    Returns:
-        float: The converted value
+    Load lab history as a list of entries.
+
+    History is stored as JSON Lines (one entry per line). Finalizing an
+    entry appends an {'id', 'op': 'update', 'patch'} record instead of
+    rewriting the file; patches are folded into their entries here. Files
+    written by older versions as a single JSON array are still read.
+    Blank and malformed lines, such as one torn by a crash, are skipped. The
+    parsed list is cached and reused until the file's mtime or size changes.
+    An unreadable file loads as an empty history.
     """
-    value = validate_positive_number(value)
-    
-    # Normalize microliter notation
-    from_unit = from_unit.replace('µ', 'u')
-    to_unit = to_unit.replace('µ', 'u')
-    
-    # Convert to liters first
-    if from_unit == 'L':
-        value_in_liters = value
-    elif from_unit == 'uL':
-        value_in_liters = value / 1_000_000
-    else:
-        raise ValueError(f"Unknown volume unit: {from_unit}")
-    
-    # Convert from liters to target unit
-    if to_unit == 'L':
-        return value_in_liters
-    elif to_unit == 'uL':
-        return value_in_liters * 1_000_000
-    else:
-        raise ValueError(f"Unknown volume unit: {to_unit}")
+    try:
+        return _read_history()
+    except Exception:
+        return []
+
+
+def _read_history():
+    """Like load_history, but raise if the file exists and can't be parsed."""
+    try:
+        st = os.stat(HISTORY_FILE)
+    except FileNotFoundError:
+        return []
+    key = (st.st_mtime_ns, st.st_size)
+    if _HISTORY_CACHE['key'] == key:
+        return _HISTORY_CACHE['data']
+    with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
+        if f.read(1) == '[':
+            f.seek(0)
+            records = [r for r in json_loads(f.read()) if isinstance(r, dict)]
+        else:
+            f.seek(0)
+            records = list(iter_json_lines(f))
+    data, patches = _fold_records(records)
+    _HISTORY_CACHE['key'] = key
+    _HISTORY_CACHE['data'] = data
+    _HISTORY_CACHE['patches'] = patches
+    return data
+
+
+def _fold_records(records):
+    """Apply update records to the entries they refer to, in file order."""
+    history = []
+    by_id = {}
+    patches = 0
+    for rec in records:
+        if rec.get('op') == 'update':
+            patches += 1
+            target = by_id.get(rec.get('id'))
+            if target is not None:
+                target.update(rec['patch'])
+            continue
+        history.append(rec)
+        if 'id' in rec:
+            by_id[rec['id']] = rec
+    return history, patches
+
 
+def _write_history(history):
+    """Rewrite the whole history file as JSON Lines, atomically."""
+    atomic_write(HISTORY_FILE, ''.join(json_dumps(e) + '\n' for e in history), fsync=True)
+    _HISTORY_CACHE['key'] = None
 
-def convert_concentration(value, from_unit, to_unit):
+
+def compact_history():
     """
-    Convert between simple concentration units used in the lab.
+    Rewrite the history file with update records folded into their entries.
 
-    Supported units: 'ng/µL', 'ng/mL', 'pg/µL'
+    Raises OSError or ValueError, leaving the file untouched, if it can't be read.
     """
-    val = validate_positive_number(value)
-    # Normalize micro symbol
-    fu = from_unit.replace('µ', 'u')
-    tu = to_unit.replace('µ', 'u')
-
-    supported = {'ng/uL', 'ng/mL', 'pg/uL'}
-    if fu not in supported:
-        raise ValueError(f"Unsupported from-unit: {from_unit}")
-    if tu not in supported:
-        raise ValueError(f"Unsupported to-unit: {to_unit}")
-
-    # Convert input to base unit ng/uL
-    if fu == 'ng/uL':
-        base = val
-    elif fu == 'ng/mL':
-        # 1 mL = 1000 µL
-        base = val / 1000.0
-    elif fu == 'pg/uL':
-        # 1 ng = 1000 pg
-        base = val / 1000.0
-
-    # Convert base to target
-    if tu == 'ng/uL':
-        return base
-    elif tu == 'ng/mL':
-        return base * 1000.0
-    elif tu == 'pg/uL':
-        return base * 1000.0
+    _write_history(_read_history())
 
 
-def load_history():
-    if not os.path.exists(HISTORY_FILE):
-        return []
-    try:
-        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception:
-        return []
+def _save_updates(history, updates):
+    """
+    Persist finalized entries.
+
+    Args:
+        history: The full history list the entries came from (already updated)
+        updates: List of (entry, patch) pairs as returned by _complete_pending
+    """
+    patches = _HISTORY_CACHE['patches'] + len(updates)
+    if any('id' not in e for e in history) or patches > len(history) * _COMPACT_RATIO:
+        # Entries saved before ids existed can't be patched; give them ids
+        # and rewrite once. Also compact when patch records pile up.
+        for e in history:
+            e.setdefault('id', uuid4().hex)
+        _write_history(history)
+        return
+    append_json_lines(HISTORY_FILE, ({'id': entry['id'], 'op': 'update', 'patch': patch}
+                                     for entry, patch in updates))
+    _HISTORY_CACHE['key'] = None
 
 
 def save_history_entry(entry: dict):
-    history = load_history()
-    history.append(entry)
-    with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-        json.dump(history, f, indent=2, ensure_ascii=False)
+    """Append a single entry to the history file without rereading it."""
+    entry.setdefault('id', uuid4().hex)
+    if os.path.exists(HISTORY_FILE):
+        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
+            legacy = f.read(1) == '['
+        if legacy:
+            # One-time migration: appending a line to a JSON array would corrupt
+            # it. _read_history raises rather than let a bad array become [].
+            _write_history(_read_history())
+    append_json_lines(HISTORY_FILE, [entry])
+    # Filesystems with coarse mtimes could otherwise serve a stale cache
+    _HISTORY_CACHE['key'] = None
 
 
 def prompt_save(entry: dict):
     choice = input('Save this result to lab history? (y/n): ').strip().lower()
     if choice == 'y' or choice == 'yes':
-        entry.setdefault('timestamp', datetime.now().isoformat())
-        save_history_entry(entry)
+        entry.setdefault('timestamp', now_iso())
+        try:
+            save_history_entry(entry)
+        except (OSError, ValueError) as e:
+            print(f'Not saved: could not read {HISTORY_FILE} ({e})')
+            return
         print('Saved to', HISTORY_FILE)
     else:
         print('Not saved.')
 
 
-def display_history():
+def display_history(pretty=False):
+    """
+    List saved history entries and offer to finalize pending experiments.
+
+    Args:
+        pretty: Also print the full history as indented JSON (readable snapshot)
+    """
     history = load_history()
     if not history:
         print('\nNo history found.')
@@ -193,11 +218,17 @@ def display_history():
         status = e.get('status', 'completed')
         summary = e.get('summary', '')
         print(f"{i:>3}. [{status}] {ts} | {module} | {summary}")
+    if pretty:
+        print(json_dumps(history, pretty=True))
 
     # Allow finalizing pending microbiology experiments
-    idx = input('\nEnter history number to finalize a pending Microbiology experiment (or press Enter to return): ').strip()
+    idx = input('\nEnter history number to finalize a pending Microbiology experiment, '
+                "'all' to finalize every pending one (or press Enter to return): ").strip()
     if not idx:
         return
+    if idx.lower() == 'all':
+        _finalize_all_pending(history)
+        return
     try:
         idxi = int(idx) - 1
         entry = history[idxi]
@@ -212,21 +243,64 @@ def display_history():
     final_N = input('Enter final bacterial count (N): ').strip()
     try:
         final_N_v = validate_positive_number(final_N)
-        gens, dt = generation_time_calculator(entry['N0'], final_N_v, entry['time_elapsed'])
-        entry['N'] = final_N_v
-        entry['generations'] = gens
-        entry['doubling_time'] = dt
-        entry['status'] = 'completed'
-        entry['completed_timestamp'] = datetime.now().isoformat()
-        # write back
-        history[idxi] = entry
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(history, f, indent=2, ensure_ascii=False)
+        details = entry['details']
+        gens, dt, _ = generation_time_calculator(details['N0'], final_N_v, details['time_elapsed'])
+        patch = _complete_pending(entry, final_N_v, gens, dt)
+        _save_updates(history, [(entry, patch)])
         print('Pending experiment finalized and saved.')
     except ValueError as e:
         print('Error:', e)
 
 
+def _complete_pending(entry, N, generations, doubling_time):
+    """
+    Record final results on a pending Microbiology entry.
+
+    Returns:
+        dict: The changed top-level fields, for an update record
+    """
+    entry['details']['N'] = N
+    entry['details']['generations'] = generations
+    entry['details']['doubling_time'] = doubling_time
+    entry['status'] = 'completed'
+    entry['completed_timestamp'] = now_iso()
+    return {
+        'details': entry['details'],
+        'status': entry['status'],
+        'completed_timestamp': entry['completed_timestamp'],
+    }
+
+
+def _finalize_all_pending(history):
+    """Finalize every pending Microbiology entry from one line of final counts."""
+    numbered = [(i, e) for i, e in enumerate(history, 1)
+                if e.get('module') == 'Microbiology' and e.get('status') == 'pending']
+    if not numbered:
+        print('No pending Microbiology experiments.')
+        return
+
+    pending = [e for _, e in numbered]
+    numbers = ', '.join(f"#{i}" for i, _ in numbered)
+    counts = input(f'Final bacterial counts (N) for {numbers}, comma-separated: ')
+    try:
+        final_Ns = [validate_positive_number(c) for c in counts.split(',')]
+        if len(final_Ns) != len(pending):
+            raise ValueError(f'Expected {len(pending)} counts, got {len(final_Ns)}')
+        gens, dts = generation_time_batch(
+            [e['details']['N0'] for e in pending],
+            final_Ns,
+            [e['details']['time_elapsed'] for e in pending],
+        )
+    except ValueError as e:
+        print('Error:', e)
+        return
+
+    updates = [(entry, _complete_pending(entry, N, g, dt))
+               for entry, N, g, dt in zip(pending, final_Ns, gens, dts)]
+    _save_updates(history, updates)
+    print(f'{len(pending)} pending experiments finalized and saved.')
+
+
 def serial_dilution(starting_conc, dilution_factor, num_steps, final_volume, conc_unit='M', vol_unit='µL'):
     """
     Calculate serial dilution recipe.
@@ -259,14 +333,23 @@ def serial_dilution(starting_conc, dilution_factor, num_steps, final_volume, con
     sample_volume = final_volume / dilution_factor
     diluent_volume = final_volume - sample_volume
     
-    results = []
-    for step in range(1, num_steps + 1):
-        concentration = starting_conc / (dilution_factor ** step)
-        results.append((step, concentration, sample_volume, diluent_volume))
+    results = _serial_dilution_core(starting_conc, dilution_factor, num_steps,
+                                    sample_volume, diluent_volume)
     
     return results, starting_conc, sample_volume, diluent_volume, conc_unit, vol_unit
 
 
+def _serial_dilution_core(starting_conc, dilution_factor, num_steps, sample_volume, diluent_volume):
+    """Numeric core of serial_dilution; expects already-validated floats and an int step count."""
+    results = [None] * num_steps
+    concentration = starting_conc
+    for i in range(num_steps):
+        # Each tube is the previous one diluted once more, as at the bench
+        concentration /= dilution_factor
+        results[i] = (i + 1, concentration, sample_volume, diluent_volume)
+    return results
+
+
 def tissue_culture_calculator(cells_counted, dilution_factor, seeding_density, total_volume_ml):
     """
     Calculate cell concentration and volume needed for tissue culture seeding.
@@ -280,13 +363,20 @@ def tissue_culture_calculator(cells_counted, dilution_factor, seeding_density, t
         total_volume_ml: Total volume of new media in mL
         
     Returns:
-        tuple: (cells_per_ml, total_cells_available, volume_to_pipet_ul)
+        tuple: (cells_per_ml, total_cells_available, volume_to_pipet_ul, inputs)
+        where inputs is the validated (cells_counted, dilution_factor,
+        seeding_density, total_volume_ml) as floats
     """
     cells_counted = validate_positive_number(cells_counted)
     dilution_factor = validate_positive_number(dilution_factor)
     seeding_density = validate_positive_number(seeding_density)
     total_volume_ml = validate_positive_number(total_volume_ml)
-    
+    inputs = (cells_counted, dilution_factor, seeding_density, total_volume_ml)
+    return (*_tissue_culture_core(*inputs), inputs)
+
+
+def _tissue_culture_core(cells_counted, dilution_factor, seeding_density, total_volume_ml):
+    """Hemocytometer arithmetic on already-validated floats (for batch use)."""
     # Hemocytometer formula: cells/mL = (cells counted / 4 squares) × dilution factor × 10,000
     # The 10,000 factor comes from the hemocytometer grid dimensions
     cells_per_ml = (cells_counted / 4) * dilution_factor * 10000
@@ -312,14 +402,21 @@ def display_tissue_culture():
         print("=" * 70)
         print("\nHemocytometer Method (Count cells in 4 squares)")
         
-        cells_counted = input("Number of cells counted (in 4 squares): ").strip()
-        dilution_factor = input("Dilution factor (e.g., 2 for 1:2 with Trypan Blue) [2]: ").strip() or '2'
-        seeding_density = input("Desired seeding density (e.g., 100000 for 1x10^5 cells/mL): ").strip()
-        total_volume = input("Total volume of new media (mL) [10]: ").strip() or '10'
+        params = _read_params([
+            ('cells_counted', "Number of cells counted (in 4 squares): ", ''),
+            ('dilution_factor', "Dilution factor (e.g., 2 for 1:2 with Trypan Blue) [2]: ", '2'),
+            ('seeding_density', "Desired seeding density (e.g., 100000 for 1x10^5 cells/mL): ", ''),
+            ('total_volume', "Total volume of new media (mL) [10]: ", '10'),
+        ])
+        cells_counted = params['cells_counted']
+        dilution_factor = params['dilution_factor']
+        seeding_density = params['seeding_density']
+        total_volume = params['total_volume']
         
-        cells_per_ml, total_cells, volume_pipet = tissue_culture_calculator(
+        cells_per_ml, total_cells, volume_pipet, inputs = tissue_culture_calculator(
             cells_counted, dilution_factor, seeding_density, total_volume
         )
+        cells_counted_v, dilution_factor_v, seeding_density_v, total_volume_v = inputs
         
         print("\n" + "=" * 70)
         print("RESULTS")
@@ -331,7 +428,7 @@ def display_tissue_culture():
         print(f"                      {cells_per_ml:,.0f} cells/mL")
         
         print(f"\nSeeding Information:")
-        print(f"  Desired seeding density: {float(seeding_density):.2e} cells/mL")
+        print(f"  Desired seeding density: {seeding_density_v:.2e} cells/mL")
         print(f"  Total volume of new media: {total_volume} mL")
         print(f"  Total cells in flask after seeding: {total_cells:.2e} cells")
         print(f"                                      {total_cells:,.0f} cells")
@@ -356,15 +453,14 @@ def display_tissue_culture():
         print(f"✗ Error: {e}\n")
     else:
         entry = {
-            'timestamp': datetime.now().isoformat(),
             'module': 'Tissue Culture',
             'summary': f'{cells_per_ml:.2e} cells/mL, volume to pipet {volume_pipet:.2f} µL',
             'details': {
-                'cells_counted_4_squares': float(cells_counted),
-                'dilution_factor': float(dilution_factor),
+                'cells_counted_4_squares': cells_counted_v,
+                'dilution_factor': dilution_factor_v,
                 'cells_per_ml': cells_per_ml,
-                'seeding_density_per_ml': float(seeding_density),
-                'total_volume_ml': float(total_volume),
+                'seeding_density_per_ml': seeding_density_v,
+                'total_volume_ml': total_volume_v,
                 'total_cells_in_flask': total_cells,
                 'volume_to_pipet_ul': volume_pipet,
             },
@@ -387,19 +483,20 @@ def dna_normalization_calculator(current_conc, current_volume_ul, target_conc, c
         fragment_bp: Fragment length in base pairs (required if using molar units)
 
     Returns:
-        tuple: (final_volume_ul, volume_te_to_add_ul)
+        tuple: (final_volume_ul, volume_te_to_add_ul, inputs) where inputs is
+        the validated (current_conc, current_volume_ul, target_conc, fragment_bp);
+        fragment_bp is None unless the unit is molar
     """
     current_conc = validate_positive_number(current_conc)
     current_vol = validate_positive_number(current_volume_ul)
     target_conc = validate_positive_number(target_conc)
 
-    unit = conc_unit.replace('u', 'µ')
+    # Canonical form: micro signs -> 'u', lower case ('ng/ul' or 'nm')
+    unit = normalize_unit(conc_unit).lower()
 
+    bp = None
     # If concentrations are provided in molar units (nM), convert to ng/µL using fragment length
-    if unit.lower() in ('nm', 'nm', 'nm', 'nm', 'nm', 'nm', 'nm'):
-        unit = 'nM'
-
-    if unit == 'nM':
+    if unit == 'nm':
         if fragment_bp is None:
             raise ValueError('Fragment length (bp) is required to convert between nM and ng/µL')
         bp = validate_positive_number(fragment_bp)
@@ -408,7 +505,7 @@ def dna_normalization_calculator(current_conc, current_volume_ul, target_conc, c
         # Convert nM to ng/µL: ng/µL = nM * MW * 1e-6
         current_ng_per_ul = current_conc * mw * 1e-6
         target_ng_per_ul = target_conc * mw * 1e-6
-    elif unit in ('ng/µL', 'ng/uL', 'ng/μL'):
+    elif unit == 'ng/ul':
         current_ng_per_ul = current_conc
         target_ng_per_ul = target_conc
     else:
@@ -428,7 +525,7 @@ def dna_normalization_calculator(current_conc, current_volume_ul, target_conc, c
         raise ValueError("Target concentration is higher than current concentration; concentration requires evaporation or concentration methods, not addition of TE.")
 
     volume_te_to_add_ul = final_volume_ul - current_vol
-    return final_volume_ul, volume_te_to_add_ul
+    return final_volume_ul, volume_te_to_add_ul, (current_conc, current_vol, target_conc, bp)
 
 
 def display_dna_normalization():
@@ -437,37 +534,44 @@ def display_dna_normalization():
         print("\n" + "=" * 60)
         print("DNA NORMALIZATION (Molecular/Forensics)")
         print("=" * 60)
-        conc_unit = input("Concentration unit for inputs (ng/µL or nM) [ng/µL]: ").strip() or 'ng/µL'
-        current_conc = input(f"Current concentration ({conc_unit}): ").strip()
-        current_vol = input("Current volume (µL): ").strip()
-        target_conc = input(f"Target concentration ({conc_unit}): ").strip()
+        params = _read_params([
+            ('conc_unit', "Concentration unit for inputs (ng/µL or nM) [ng/µL]: ", 'ng/µL'),
+            ('current_conc', "Current concentration ({conc_unit}): ", ''),
+            ('current_vol', "Current volume (µL): ", ''),
+            ('target_conc', "Target concentration ({conc_unit}): ", ''),
+        ])
+        conc_unit = params['conc_unit']
+        current_conc = params['current_conc']
+        current_vol = params['current_vol']
+        target_conc = params['target_conc']
         fragment_bp = None
         if conc_unit.lower() == 'nM'.lower():
-            fragment_bp = input("Fragment length in bp (required for molar units): ").strip()
+            # Batch lines may already carry fragment_bp=...
+            fragment_bp = params.get('fragment_bp') or input("Fragment length in bp (required for molar units): ").strip()
 
-        final_vol, vol_te = dna_normalization_calculator(current_conc, current_vol, target_conc, conc_unit, fragment_bp)
+        final_vol, vol_te, inputs = dna_normalization_calculator(current_conc, current_vol, target_conc, conc_unit, fragment_bp)
+        current_conc_v, current_vol_v, target_conc_v, fragment_bp_v = inputs
 
         print("\nResults:")
         print(f"  Input unit: {conc_unit}")
-        print(f"  Current: {float(current_conc):.2f} {conc_unit}, {float(current_vol):.1f} µL")
-        print(f"  Target: {float(target_conc):.2f} {conc_unit}")
+        print(f"  Current: {current_conc_v:.2f} {conc_unit}, {current_vol_v:.1f} µL")
+        print(f"  Target: {target_conc_v:.2f} {conc_unit}")
         print(f"  Final total volume required: {final_vol:.2f} µL")
         print(f"  Volume of TE buffer to add: {vol_te:.2f} µL")
         if vol_te < 1:
             print("  ⚠ Note: Volume to add is <1 µL; this may be impractical to pipet accurately.")
         print("\n")
         entry = {
-            'timestamp': datetime.now().isoformat(),
             'module': 'Molecular - DNA Normalization',
-            'summary': f'Normalize to {float(target_conc):.2f} {conc_unit}',
+            'summary': f'Normalize to {target_conc_v:.2f} {conc_unit}',
             'details': {
                 'input_unit': conc_unit,
-                'current_conc': float(current_conc),
-                'current_volume_ul': float(current_vol),
-                'target_conc': float(target_conc),
+                'current_conc': current_conc_v,
+                'current_volume_ul': current_vol_v,
+                'target_conc': target_conc_v,
                 'final_volume_ul': final_vol,
                 'volume_TE_to_add_ul': vol_te,
-                'fragment_bp': fragment_bp
+                'fragment_bp': fragment_bp_v
             },
             'status': 'completed'
         }
@@ -486,19 +590,25 @@ def generation_time_calculator(N0, N, t):
         t: Total time elapsed (in hours, or user units)
 
     Returns:
-        tuple: (generations, doubling_time)
+        tuple: (generations, doubling_time, inputs) where inputs is the
+        validated (N0, N, t) as floats
     """
-    N0_v = validate_positive_number(N0)
-    N_v = validate_positive_number(N)
-    t_v = validate_positive_number(t)
+    N0_v = _validate_positive_float(N0)
+    N_v = _validate_positive_float(N)
+    t_v = _validate_positive_float(t)
 
+    if N0_v <= 0:
+        raise ValueError('Starting count must be greater than 0')
     if N_v <= N0_v:
         raise ValueError('Final count must be greater than starting count')
 
-    import math
-    generations = math.log(N_v / N0_v, 2)
+    if N_v > 1e300 or N0_v < 1e-300:
+        # The ratio itself could overflow to inf; subtract logs instead
+        generations = log2(N_v) - log2(N0_v)
+    else:
+        generations = log2(N_v / N0_v)
     doubling_time = t_v / generations
-    return generations, doubling_time
+    return generations, doubling_time, (N0_v, N_v, t_v)
 
 
 def display_generation_time():
@@ -514,7 +624,6 @@ def display_generation_time():
         if not N:
             # save pending experiment
             entry = {
-                'timestamp': datetime.now().isoformat(),
                 'module': 'Microbiology',
                 'summary': f'Pending experiment: N0={N0}, time={t}',
                 'details': {
@@ -526,19 +635,18 @@ def display_generation_time():
             prompt_save(entry)
             return
 
-        gens, dt = generation_time_calculator(N0, N, t)
+        gens, dt, (N0_v, N_v, t_v) = generation_time_calculator(N0, N, t)
         print(f"\nResults:")
         print(f"  Generations (n): {gens:.4f}")
         print(f"  Doubling time: {dt:.4f} (same time units as input)")
         print("\n")
         entry = {
-            'timestamp': datetime.now().isoformat(),
             'module': 'Microbiology',
             'summary': f'N0={N0} -> N={N} in {t}',
             'details': {
-                'N0': float(N0),
-                'N': float(N),
-                'time_elapsed': float(t),
+                'N0': N0_v,
+                'N': N_v,
+                'time_elapsed': t_v,
                 'generations': gens,
                 'doubling_time': dt
             },
@@ -556,49 +664,57 @@ def display_serial_dilution():
         print("Serial Dilution Calculator")
         print("=" * 60)
         
-        starting_conc = input("Starting concentration: ").strip()
-        conc_unit = input("Concentration unit (e.g., M, mM, ng/mL) [M]: ").strip() or 'M'
-        dilution_factor = input("Dilution factor (e.g., 10 for 1:10) [10]: ").strip() or '10'
-        num_steps = input("Number of dilution steps [5]: ").strip() or '5'
-        final_volume = input("Final volume per tube [100]: ").strip() or '100'
-        vol_unit = input("Volume unit (e.g., µL, mL, L) [µL]: ").strip() or 'µL'
+        params = _read_params([
+            ('starting_conc', "Starting concentration: ", ''),
+            ('conc_unit', "Concentration unit (e.g., M, mM, ng/mL) [M]: ", 'M'),
+            ('dilution_factor', "Dilution factor (e.g., 10 for 1:10) [10]: ", '10'),
+            ('num_steps', "Number of dilution steps [5]: ", '5'),
+            ('final_volume', "Final volume per tube [100]: ", '100'),
+            ('vol_unit', "Volume unit (e.g., µL, mL, L) [µL]: ", 'µL'),
+        ])
+        starting_conc = params['starting_conc']
+        conc_unit = params['conc_unit']
+        dilution_factor = params['dilution_factor']
+        num_steps = params['num_steps']
+        final_volume = params['final_volume']
+        vol_unit = params['vol_unit']
         
         results, start_conc, sample_vol, diluent_vol, conc_u, vol_u = serial_dilution(
             starting_conc, dilution_factor, num_steps, final_volume, conc_unit, vol_unit
         )
         
-        print("\n" + "=" * 60)
-        print("SERIAL DILUTION RECIPE")
-        print("=" * 60)
-        print(f"Starting Concentration: {start_conc} {conc_u}")
-        print(f"Dilution Factor: 1:{dilution_factor}")
-        print(f"Sample Volume per Tube: {sample_vol:.4g} {vol_u}")
-        print(f"Diluent Volume per Tube: {diluent_vol:.4g} {vol_u}")
-        print(f"Total Volume per Tube: {sample_vol + diluent_vol:.4g} {vol_u}")
-        print("-" * 60)
-        print(f"{'Step':<6} {'Concentration':<20} {'Sample':<15} {'Diluent':<15}")
-        print(f"{'':6} {f'({conc_u})':<20} {f'({vol_u})':<15} {f'({vol_u})':<15}")
-        print("-" * 60)
-        
+        # Build the whole recipe and write it once rather than print per line
+        lines = [
+            "\n" + "=" * 60,
+            "SERIAL DILUTION RECIPE",
+            "=" * 60,
+            f"Starting Concentration: {start_conc} {conc_u}",
+            f"Dilution Factor: 1:{dilution_factor}",
+            f"Sample Volume per Tube: {sample_vol:.4g} {vol_u}",
+            f"Diluent Volume per Tube: {diluent_vol:.4g} {vol_u}",
+            f"Total Volume per Tube: {sample_vol + diluent_vol:.4g} {vol_u}",
+            "-" * 60,
+            f"{'Step':<6} {'Concentration':<20} {'Sample':<15} {'Diluent':<15}",
+            f"{'':6} {f'({conc_u})':<20} {f'({vol_u})':<15} {f'({vol_u})':<15}",
+            "-" * 60,
+        ]
         for step, conc, sample, diluent in results:
             source = "Starting solution" if step == 1 else f"Tube {step-1}"
-            print(f"{step:<6} {conc:<20.6g} {sample:<15.4g} {diluent:<15.4g}")
-            if step == 1:
-                print(f"       (From: {source})")
-            else:
-                print(f"       (From: {source})")
-        
-        print("-" * 60)
-        print("\nInstructions:")
-        print(f"1. For tube 1: Mix {sample_vol:.4g} {vol_u} of STARTING SOLUTION")
-        print(f"               with {diluent_vol:.4g} {vol_u} of DILUENT")
-        for step in range(2, int(num_steps) + 1):
-            print(f"{step}. For tube {step}: Mix {sample_vol:.4g} {vol_u} of TUBE {step-1}")
-            print(f"               with {diluent_vol:.4g} {vol_u} of DILUENT")
+            lines.append(f"{step:<6} {conc:<20.6g} {sample:<15.4g} {diluent:<15.4g}")
+            lines.append(f"       (From: {source})")
+        lines += [
+            "-" * 60,
+            "\nInstructions:",
+            f"1. For tube 1: Mix {sample_vol:.4g} {vol_u} of STARTING SOLUTION",
+            f"               with {diluent_vol:.4g} {vol_u} of DILUENT",
+        ]
+        for step in range(2, len(results) + 1):
+            lines.append(f"{step}. For tube {step}: Mix {sample_vol:.4g} {vol_u} of TUBE {step-1}")
+            lines.append(f"               with {diluent_vol:.4g} {vol_u} of DILUENT")
+        sys.stdout.write("\n".join(lines) + "\n")
         
         # Offer to save recipe to lab history
         entry = {
-            'timestamp': datetime.now().isoformat(),
             'module': 'Biochemistry - Serial Dilution',
             'summary': f'1:{dilution_factor} serial dilution, {num_steps} steps, {final_volume}{vol_u} per tube',
             'details': {
@@ -620,74 +736,88 @@ def display_serial_dilution():
         print(f"✗ Error: {e}\n")
 
 
-def interactive_converter():
-    """Main menu for the Universal Lab Assistant."""
-    def display_biochemistry():
-        while True:
-            print("\nBiochemistry — choose an option:")
-            print("  1. Concentration conversion (ng/µL ↔ ng/mL ↔ pg/µL)")
-            print("  2. Molarity conversion (M ↔ mM)")
-            print("  3. Serial dilution calculator")
-            print("  4. Back to main menu")
-            choice = input("Select 1-3: ").strip()
-            if choice == '1':
-                try:
-                    value = input("Enter value: ").strip()
-                    from_u = input("From unit (ng/µL, ng/mL, pg/µL): ").strip()
-                    to_u = input("To unit (ng/µL, ng/mL, pg/µL): ").strip()
-                    res = convert_concentration(value, from_u, to_u)
-                    print(f"\n✓ Result: {value} {from_u} = {res:.6g} {to_u}\n")
-                except ValueError as e:
-                    print(f"✗ Error: {e}\n")
-            elif choice == '2':
-                try:
-                    value = input("Enter value: ").strip()
-                    from_u = input("From unit (M/mM): ").strip()
-                    to_u = input("To unit (M/mM): ").strip()
-                    res = convert_molarity(value, from_u, to_u)
-                    print(f"\n✓ Result: {value} {from_u} = {res:.6g} {to_u}\n")
-                except ValueError as e:
-                    print(f"✗ Error: {e}\n")
-            elif choice == '3':
-                display_serial_dilution()
-            elif choice == '4':
-                break
-            else:
-                print("Invalid choice — please select 1-4.")
+def _prompt_conversion(convert, units):
+    """Prompt for a value and unit pair, then print the converted result."""
+    try:
+        value = input("Enter value: ").strip()
+        from_u = input(f"From unit ({units}): ").strip()
+        to_u = input(f"To unit ({units}): ").strip()
+        res = convert(value, from_u, to_u)
+        print(f"\n✓ Result: {value} {from_u} = {res:.6g} {to_u}\n")
+    except ValueError as e:
+        print(f"✗ Error: {e}\n")
+
+
+def display_concentration_conversion():
+    """Prompt for and display a concentration conversion."""
+    _prompt_conversion(convert_concentration, "ng/µL, ng/mL, pg/µL")
+
+
+def display_molarity_conversion():
+    """Prompt for and display a molarity conversion."""
+    _prompt_conversion(convert_molarity, "M/mM")
 
+
+# Menu choice -> (label, handler); a None handler leaves the menu
+_BIO_MENU = {
+    '1': ("Concentration conversion (ng/µL ↔ ng/mL ↔ pg/µL)", display_concentration_conversion),
+    '2': ("Molarity conversion (M ↔ mM)", display_molarity_conversion),
+    '3': ("Serial dilution calculator", display_serial_dilution),
+    '4': ("Back to main menu", None),
+}
+
+
+def _run_menu(menu, prompt, exit_word=None):
+    """
+    Show a menu until the user picks an entry with no handler.
+
+    Args:
+        menu: Dict of choice -> (label, handler) such as _BIO_MENU
+        prompt: Text printed before the options on every loop
+        exit_word: Optional typed alternative to the exit choice (e.g. 'exit')
+    """
+    last = next(reversed(menu))
     while True:
-        print("\n" + "=" * 60)
-        print("Universal Lab Assistant — Main Menu")
-        print("=" * 60)
-        print("  1. Biochemistry (Molarity & Dilutions)")
-        print("  2. Tissue Culture (Cell Counting & Seeding)")
-        print("  3. Molecular/Forensics (DNA Normalization)")
-        print("  4. Microbiology (Generation Time)")
-        print("  5. View Lab History")
-        print("  6. Exit")
-        choice = input("Select 1-6: ").strip()
-
-        if choice == '1':
-            display_biochemistry()
-            continue
-        elif choice == '2':
-            display_tissue_culture()
-            continue
-        elif choice == '3':
-            display_dna_normalization()
+        print(prompt)
+        for key, (label, _) in menu.items():
+            print(f"  {key}. {label}")
+        choice = input(f"Select 1-{last}: ").strip()
+        if exit_word and choice.lower() == exit_word:
+            choice = last
+        if choice not in menu:
+            print(f"Invalid choice — please select 1-{last}.")
             continue
-        elif choice == '4':
-            display_generation_time()
-            continue
-        elif choice == '5':
-            display_history()
-            continue
-        elif choice == '6' or choice.lower() == 'exit':
-            print("Goodbye!")
-            break
-        else:
-            print("Invalid choice — please select 1-6.")
+        handler = menu[choice][1]
+        if handler is None:
+            return
+        handler()
+
+
+def display_biochemistry():
+    """Biochemistry submenu: conversions and serial dilutions."""
+    _run_menu(_BIO_MENU, "\nBiochemistry — choose an option:")
+
+
+_MAIN_MENU = {
+    '1': ("Biochemistry (Molarity & Dilutions)", display_biochemistry),
+    '2': ("Tissue Culture (Cell Counting & Seeding)", display_tissue_culture),
+    '3': ("Molecular/Forensics (DNA Normalization)", display_dna_normalization),
+    '4': ("Microbiology (Generation Time)", display_generation_time),
+    '5': ("View Lab History", display_history),
+    '6': ("Exit", None),
+}
+
+
+def interactive_converter(pretty_history=False):
+    """Main menu for the Universal Lab Assistant."""
+    menu = _MAIN_MENU
+    if pretty_history:
+        label, _ = menu['5']
+        menu = {**menu, '5': (label, partial(display_history, pretty=True))}
+    title = "\n" + "=" * 60 + "\nUniversal Lab Assistant — Main Menu\n" + "=" * 60
+    _run_menu(menu, title, exit_word='exit')
+    print("Goodbye!")
 
 
 if __name__ == "__main__":
-    interactive_converter()
+    interactive_converter(pretty_history='--pretty' in sys.argv[1:])
@@ -9,7 +9,12 @@ from culture import display_tissue_culture
 from micro import display_generation_time
 from forensics import display_dna_normalization, display_normalize_dna_forensics
 from storage import display_history, prompt_save, compute_cost_for_volume, load_reagents, update_reagent_price
-from datetime import datetime
+import sys
+
+# Serial dilution recipe layout, shared by every row of the table
+_HDR_FMT = "{:<6} {:<20} {:<15} {:<15}"
+_ROW_FMT = "{:<6} {:<20.6g} {:<15.4g} {:<15.4g}\n       (From: {})"
+_INSTR_FMT = "{}. For tube {}: Mix {:.4g} {} of {}\n               with {:.4g} {} of DILUENT"
 
 
 def display_biochemistry():
@@ -97,34 +102,36 @@ def display_serial_dilution():
             starting_conc, dilution_factor, num_steps, final_volume, conc_unit, vol_unit
         )
         
-        print("\n" + "=" * 60)
-        print("SERIAL DILUTION RECIPE")
-        print("=" * 60)
-        print(f"Starting Concentration: {start_conc} {conc_unit}")
-        print(f"Dilution Factor: 1:{dilution_factor}")
-        print(f"Sample Volume per Tube: {sample_vol:.4g} {vol_unit}")
-        print(f"Diluent Volume per Tube: {diluent_vol:.4g} {vol_unit}")
-        print(f"Total Volume per Tube: {sample_vol + diluent_vol:.4g} {vol_unit}")
-        print("-" * 60)
-        print(f"{'Step':<6} {'Concentration':<20} {'Sample':<15} {'Diluent':<15}")
-        print(f"{'':6} {f'({conc_unit})':<20} {f'({vol_unit})':<15} {f'({vol_unit})':<15}")
-        print("-" * 60)
-        
-        for step, conc, sample, diluent in results:
-            source = "Starting solution" if step == 1 else f"Tube {step-1}"
-            print(f"{step:<6} {conc:<20.6g} {sample:<15.4g} {diluent:<15.4g}")
-            print(f"       (From: {source})")
-        
-        print("-" * 60)
-        print("\nInstructions:")
-        print(f"1. For tube 1: Mix {sample_vol:.4g} {vol_unit} of STARTING SOLUTION")
-        print(f"               with {diluent_vol:.4g} {vol_unit} of DILUENT")
-        for step in range(2, int(num_steps) + 1):
-            print(f"{step}. For tube {step}: Mix {sample_vol:.4g} {vol_unit} of TUBE {step-1}")
-            print(f"               with {diluent_vol:.4g} {vol_unit} of DILUENT")
+        # Build the whole recipe and write it once rather than print per line
+        lines = [
+            "\n" + "=" * 60,
+            "SERIAL DILUTION RECIPE",
+            "=" * 60,
+            f"Starting Concentration: {start_conc} {conc_unit}",
+            f"Dilution Factor: 1:{dilution_factor}",
+            f"Sample Volume per Tube: {sample_vol:.4g} {vol_unit}",
+            f"Diluent Volume per Tube: {diluent_vol:.4g} {vol_unit}",
+            f"Total Volume per Tube: {sample_vol + diluent_vol:.4g} {vol_unit}",
+            "-" * 60,
+            _HDR_FMT.format('Step', 'Concentration', 'Sample', 'Diluent'),
+            _HDR_FMT.format('', f'({conc_unit})', f'({vol_unit})', f'({vol_unit})'),
+            "-" * 60,
+        ]
+        lines += [
+            _ROW_FMT.format(step, conc, sample, diluent,
+                            "Starting solution" if step == 1 else f"Tube {step-1}")
+            for step, conc, sample, diluent in results
+        ]
+        lines += ["-" * 60, "\nInstructions:"]
+        lines += [
+            _INSTR_FMT.format(step, step, sample_vol, vol_unit,
+                              "STARTING SOLUTION" if step == 1 else f"TUBE {step-1}",
+                              diluent_vol, vol_unit)
+            for step in range(1, len(results) + 1)
+        ]
+        sys.stdout.write("\n".join(lines) + "\n")
         
         entry = {
-            'timestamp': datetime.now().isoformat(),
             'module': 'Biochemistry - Serial Dilution',
             'summary': f'1:{dilution_factor} dilution, {num_steps} steps, {final_volume}{vol_unit}/tube',
             'details': {
@@ -191,8 +198,13 @@ def display_settings():
             print('Invalid choice.')
 
 
-def run_main_menu():
-    """Main interactive menu."""
+def run_main_menu(pretty_history=False):
+    """
+    Main interactive menu.
+
+    Args:
+        pretty_history: Print the history as indented JSON when viewing it
+    """
     while True:
         print("\n" + "=" * 60)
         print("Universal Lab Assistant — Main Menu")
@@ -223,7 +235,7 @@ def run_main_menu():
                 prompt_save(entry)
         
         elif choice == '5':
-            display_history()
+            display_history(pretty=pretty_history)
         
         elif choice == '6':
             display_settings()
@@ -237,4 +249,4 @@ def run_main_menu():
 
 
 if __name__ == "__main__":
-    run_main_menu()
+    run_main_menu(pretty_history='--pretty' in sys.argv[1:])
@@ -9,11 +9,45 @@ def generation_time_calculator(N0, N, t):
     N_v = validate_positive_number(N)
     t_v = validate_positive_number(t)
 
+    if N0_v <= 0:
+        raise ValueError('Starting count must be greater than 0')
     if N_v <= N0_v:
         raise ValueError('Final count must be greater than starting count')
 
-    generations = math.log(N_v / N0_v, 2)
-    doubling_time = t_v / generations
+    return _generation_kernel(N0_v, N_v, t_v)
+
+
+def generation_time_batch(N0, N, t):
+    """
+    Calculate generations and doubling times for several experiments at once.
+
+    Args:
+        N0: Sequence of starting counts
+        N: Sequence of final counts
+        t: Sequence of elapsed times
+
+    Returns:
+        tuple: (generations, doubling_times) as lists, in input order
+    """
+    if not len(N0) == len(N) == len(t):
+        raise ValueError('N0, N and t must have the same length')
+    generations = []
+    doubling_times = []
+    for n0, n, elapsed in zip(N0, N, t):
+        g, dt = generation_time_calculator(n0, n, elapsed)
+        generations.append(g)
+        doubling_times.append(dt)
+    return generations, doubling_times
+
+
+def _generation_kernel(N0, N, t):
+    """Generations and doubling time for validated floats with N > N0 > 0."""
+    if N > 1e300 or N0 < 1e-300:
+        # The ratio itself could overflow to inf; subtract logs instead
+        generations = math.log2(N) - math.log2(N0)
+    else:
+        generations = math.log2(N / N0)
+    doubling_time = t / generations
     return generations, doubling_time
 
 
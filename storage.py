@@ -1,62 +1,256 @@
-"""Storage module: JSON history management."""
-import json
+"""Storage module: JSON Lines history management and reagent pricing."""
+import atexit
 import os
-from datetime import datetime
+import sys
+from uuid import uuid4
 
+from micro import generation_time_batch, generation_time_calculator
+from utils import (append_json_lines, atomic_write, iter_json_lines, json_dumps, json_loads,
+                   now_iso, validate_positive_number)
+
+# Legacy JSON-array history; read once and migrated to HISTORY_JSONL
 HISTORY_FILE = os.path.join(os.path.dirname(__file__), 'lab_history.json')
+HISTORY_JSONL = HISTORY_FILE + 'l'
 REAGENTS_FILE = os.path.join(os.path.dirname(__file__), 'reagents.json')
 
+# When to fsync history appends: 'immediate' (every save), 'group' (once
+# every GROUP_COMMIT_SIZE saves, and at exit) or 'none' (leave it to the OS)
+FLUSH_POLICY = 'group'
+GROUP_COMMIT_SIZE = 8
+_unsynced_saves = 0
 
-def load_history():
-    """Load lab history from JSON file."""
-    if not os.path.exists(HISTORY_FILE):
-        return []
+# Finalizing appends update records; rewrite the file once they
+# outnumber this share of entries
+COMPACT_RATIO = 0.5
+
+# display_history writes its listing in chunks of this many lines
+_WRITE_CHUNK = 512
+
+# path -> ((st_mtime_ns, st_size), parsed data); writers drop their entry
+_json_cache = {}
+
+
+def _cache_key(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _cached_load(path, parse):
+    """Return parse(file) for path, reusing the last result until the file changes."""
+    key = _cache_key(path)
+    hit = _json_cache.get(path)
+    if hit is not None and hit[0] == key:
+        return hit[1]
+    with open(path, 'r', encoding='utf-8') as f:
+        data = parse(f)
+    _json_cache[path] = (key, data)
+    return data
+
+
+def _collect_patches(records):
+    """Map entry id -> list of patches from the update records, in file order."""
+    patches = {}
+    for rec in records:
+        if rec.get('op') == 'update' and isinstance(rec.get('patch'), dict):
+            patches.setdefault(rec.get('id'), []).append(rec['patch'])
+    return patches
+
+
+def _fold_updates(records, patches):
+    """Yield the entries among records with their patches applied."""
+    for rec in records:
+        if rec.get('op') == 'update':
+            continue
+        for patch in patches.get(rec.get('id'), ()):
+            rec.update(patch)
+        yield rec
+
+
+def _parse_jsonl(f):
+    """Parse history lines, folding update records into the entries they patch."""
+    records = list(iter_json_lines(f))
+    patches = _collect_patches(records)
+    history = list(_fold_updates(records, patches))
+    return history, sum(len(p) for p in patches.values())
+
+
+def _migrate_history():
+    """Convert the legacy JSON-array history to JSON Lines, once."""
+    if os.path.exists(HISTORY_JSONL) or not os.path.exists(HISTORY_FILE):
+        return
     try:
         with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            history = json_loads(f.read())
     except Exception:
-        return []
+        return
+    _write_history(history)
+
+
+def _atomic_write(path, data, fsync):
+    """Replace path with data via utils.atomic_write and drop its cache entry."""
+    atomic_write(path, data, fsync)
+    _json_cache.pop(path, None)
+
+
+def _write_history(history):
+    """Rewrite the whole JSON Lines history file."""
+    global _unsynced_saves
+    durable = FLUSH_POLICY != 'none'
+    _atomic_write(HISTORY_JSONL, ''.join(json_dumps(e) + '\n' for e in history), durable)
+    if durable:
+        # The synced rewrite also covers any appends still awaiting fsync
+        _unsynced_saves = 0
+
+
+def _load_history_records():
+    """Return (history, number of update records folded into it)."""
+    _migrate_history()
+    try:
+        return _cached_load(HISTORY_JSONL, _parse_jsonl)
+    except Exception:
+        return [], 0
+
+
+def load_history():
+    """Load lab history from the JSON Lines file (one entry per line)."""
+    return _load_history_records()[0]
+
+
+def iter_history():
+    """
+    Yield history entries one at a time, with update records applied.
+
+    A first pass over the file keeps only the update records, so memory
+    grows with the number of pending patches rather than the history. If
+    the parsed history is already cached it is reused instead. Yields the
+    same entries, in the same order, as load_history.
+    """
+    _migrate_history()
+    try:
+        key = _cache_key(HISTORY_JSONL)
+    except OSError:
+        return
+    hit = _json_cache.get(HISTORY_JSONL)
+    if hit is not None and hit[0] == key:
+        yield from hit[1][0]
+        return
+    with open(HISTORY_JSONL, 'r', encoding='utf-8') as f:
+        # Update records are always written compactly with an "op" key
+        patches = _collect_patches(iter_json_lines(line for line in f if '"op":' in line))
+        f.seek(0)
+        yield from _fold_updates(iter_json_lines(f), patches)
 
 
 def save_history_entry(entry: dict):
-    """Save a single entry to lab history."""
-    history = load_history()
-    history.append(entry)
-    with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-        json.dump(history, f, indent=2, ensure_ascii=False)
+    """Append a single entry to lab history, syncing per FLUSH_POLICY."""
+    entry.setdefault('id', uuid4().hex)
+    entry.setdefault('timestamp', now_iso())
+    _migrate_history()
+    _append_history(entry)
+
+
+def update_history_entry(history, entry, patch):
+    """Apply patch to an entry of history and persist it."""
+    update_history_entries(history, [(entry, patch)])
+
+
+def update_history_entries(history, updates):
+    """
+    Apply (entry, patch) pairs to entries of history and persist them.
+
+    Each change is appended as an {'id', 'op': 'update', 'patch'} record
+    rather than rewriting the file. The file is rewritten instead when
+    entries predate ids, or when update records exceed COMPACT_RATIO.
+    """
+    for entry, patch in updates:
+        entry.update(patch)
+    _, patches = _load_history_records()
+    if (any('id' not in entry for entry, _ in updates)
+            or patches + len(updates) > len(history) * COMPACT_RATIO):
+        for e in history:
+            e.setdefault('id', uuid4().hex)
+        _write_history(history)
+        return
+    _append_history(*({'id': entry['id'], 'op': 'update', 'patch': patch}
+                      for entry, patch in updates))
+
+
+def _append_history(*records):
+    """Append records to the JSON Lines file, syncing per FLUSH_POLICY."""
+    global _unsynced_saves
+    _unsynced_saves += len(records)
+    sync = FLUSH_POLICY == 'immediate' or (
+        FLUSH_POLICY == 'group' and _unsynced_saves >= GROUP_COMMIT_SIZE)
+    append_json_lines(HISTORY_JSONL, records, fsync=sync)
+    if sync:
+        _unsynced_saves = 0
+    # Coarse mtimes could let an append look unchanged
+    _json_cache.pop(HISTORY_JSONL, None)
+
+
+@atexit.register
+def flush_history():
+    """fsync history appends still pending under the 'group' policy."""
+    global _unsynced_saves
+    if not _unsynced_saves or not os.path.exists(HISTORY_JSONL):
+        return
+    # fsync on any descriptor flushes the file's dirty pages from earlier writes
+    with open(HISTORY_JSONL, 'a', encoding='utf-8') as f:
+        os.fsync(f.fileno())
+    _unsynced_saves = 0
 
 
 def prompt_save(entry: dict):
     """Prompt user to save an entry to lab history."""
     choice = input('Save to lab history? (y/n): ').strip().lower()
     if choice in ('y', 'yes'):
-        entry.setdefault('timestamp', datetime.now().isoformat())
         save_history_entry(entry)
-        print(f'✓ Saved to {HISTORY_FILE}')
+        print(f'✓ Saved to {HISTORY_JSONL}')
     else:
         print('Not saved.')
 
 
+def _price_per_ul(info):
+    """Price of one µL of a reagent from its stored 'price_per_unit' and 'unit'."""
+    price = float(info.get('price_per_unit', 0.0))
+    # Unknown units are treated as per µL
+    return price / 1000.0 if info.get('unit', 'uL') == 'mL' else price
+
+
+def _parse_reagents(f):
+    """Parse reagent pricing and derive each reagent's 'price_per_ul'."""
+    reagents = json_loads(f.read())
+    for info in reagents.values():
+        try:
+            info['price_per_ul'] = _price_per_ul(info)
+        except (AttributeError, TypeError, ValueError):
+            # Keep a bad row as stored rather than failing the whole file
+            continue
+    return reagents
+
+
 def load_reagents():
     """Load reagent pricing from JSON file."""
-    if not os.path.exists(REAGENTS_FILE):
-        return {}
     try:
-        with open(REAGENTS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return _cached_load(REAGENTS_FILE, _parse_reagents)
     except Exception:
         return {}
 
 
 def save_reagents(reagents: dict):
     """Save reagent pricing to JSON file."""
-    with open(REAGENTS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(reagents, f, indent=2, ensure_ascii=False)
+    # price_per_ul is derived on load, so it is not stored
+    stored = {name: ({k: v for k, v in info.items() if k != 'price_per_ul'}
+                     if isinstance(info, dict) else info)
+              for name, info in reagents.items()}
+    # reagents.json is hand-edited config, not a hot path, so keep it indented
+    _atomic_write(REAGENTS_FILE, json_dumps(stored, pretty=True) + '\n', FLUSH_POLICY != 'none')
 
 
 def update_reagent_price(name: str, price_per_unit: float, unit: str = 'uL'):
     """Add or update a reagent price. Unit should be 'uL' or 'mL'."""
-    reagents = load_reagents()
+    # Copy so the cached dict is never mutated
+    reagents = dict(load_reagents())
     reagents[name] = {
         'price_per_unit': float(price_per_unit),
         'unit': unit
@@ -78,33 +272,43 @@ def compute_cost_for_volume(name: str, volume_ul: float):
     info = get_reagent_price(name)
     if not info:
         return None
-    price = float(info.get('price_per_unit', 0.0))
-    unit = info.get('unit', 'uL')
-    if unit == 'uL':
-        return price * float(volume_ul)
-    elif unit == 'mL':
-        # convert µL to mL
-        return price * (float(volume_ul) / 1000.0)
-    else:
-        # unknown unit, assume per µL
-        return price * float(volume_ul)
+    price = info.get('price_per_ul')
+    if price is None:
+        price = _price_per_ul(info)
+    return price * float(volume_ul)
 
 
-def display_history():
-    """Display lab history and finalize pending experiments."""
-    from micro import generation_time_calculator
-    from utils import validate_positive_number
-    
-    history = load_history()
-    if not history:
-        print('\nNo history found.')
-        return
+def compute_cost_for_volumes(name: str, volumes_ul):
+    """Compute costs for several volumes (µL) of one reagent.
+
+    Returns a list of costs in input order, or None if reagent not found.
+    """
+    info = get_reagent_price(name)
+    if not info:
+        return None
+    price = info.get('price_per_ul')
+    if price is None:
+        price = _price_per_ul(info)
+    return [price * float(v) for v in volumes_ul]
+
+
+def display_history(pretty=False):
+    """
+    Display lab history and finalize pending experiments.
 
-    print('\n' + '=' * 80)
-    print('LAB HISTORY')
-    print('=' * 80)
+    Args:
+        pretty: Also print the full history as indented JSON (readable export)
+    """
+    # Print and sum in one streaming pass. Only pending Microbiology
+    # entries are kept, by number, to check a selection against later.
+    lines = ['\n' + '=' * 80, 'LAB HISTORY', '=' * 80]
     total_spend = 0.0
-    for i, e in enumerate(history, 1):
+    count = 0
+    pending = {}
+    for i, e in enumerate(iter_history(), 1):
+        count = i
+        if e.get('module') == 'Microbiology' and e.get('status') == 'pending':
+            pending[i] = e
         ts = e.get('timestamp', '')
         module = e.get('module', '')
         status = e.get('status', 'completed')
@@ -115,25 +319,46 @@ def display_history():
                 total_spend += float(cost)
             except Exception:
                 pass
-        print(f"{i:>3}. [{status}] {ts} | {module} | {summary}")
+        lines.append(f"{i:>3}. [{status}] {ts} | {module} | {summary}")
         if cost:
-            print(f"       Estimated cost: ${float(cost):.2f}")
+            lines.append(f"       Estimated cost: ${float(cost):.2f}")
+        if len(lines) >= _WRITE_CHUNK:
+            sys.stdout.write('\n'.join(lines) + '\n')
+            lines.clear()
+    if not count:
+        print('\nNo history found.')
+        return
+    # One write per chunk of lines instead of a print per line
+    if lines:
+        sys.stdout.write('\n'.join(lines) + '\n')
+    if pretty:
+        print(json_dumps(load_history(), pretty=True))
 
-    idx = input('\nEnter number to finalize pending Microbiology experiment (or press Enter): ').strip()
+    idx = input('\nEnter number to finalize pending Microbiology experiment, '
+                "'all' for every pending one (or press Enter): ").strip()
     if not idx:
         print('\n' + '-' * 40)
         print(f"Total Project Spend (from history): ${total_spend:.2f}")
         return
+    if idx.lower() == 'all':
+        _finalize_all_pending(load_history())
+        return
     try:
-        idxi = int(idx) - 1
-        entry = history[idxi]
-    except Exception:
+        num = int(idx)
+    except ValueError:
+        num = 0
+    if not 1 <= num <= count:
         print('Invalid selection.')
         return
-
-    if entry.get('module') != 'Microbiology' or entry.get('status') != 'pending':
+    if num not in pending:
         print('Not a pending Microbiology experiment.')
         return
+    # Second pass: the full list is needed to persist the update
+    history = load_history()
+    if len(history) < num or history[num - 1] != pending[num]:
+        print('History changed since it was listed; please list it again.')
+        return
+    entry = history[num - 1]
 
     final_N = input('Enter final bacterial count (N): ').strip()
     try:
@@ -143,15 +368,48 @@ def display_history():
             final_N_v,
             entry['details']['time_elapsed']
         )
-        entry['details']['N'] = final_N_v
-        entry['details']['generations'] = gens
-        entry['details']['doubling_time'] = dt
-        entry['status'] = 'completed'
-        entry['completed_timestamp'] = datetime.now().isoformat()
-        
-        history[idxi] = entry
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(history, f, indent=2, ensure_ascii=False)
+        details = dict(entry['details'], N=final_N_v, generations=gens, doubling_time=dt)
+        update_history_entry(history, entry, {
+            'details': details,
+            'status': 'completed',
+            'completed_timestamp': now_iso(),
+        })
         print('✓ Pending experiment finalized and saved.')
     except ValueError as e:
         print(f'Error: {e}')
+
+
+def _finalize_all_pending(history):
+    """Finalize every pending Microbiology entry from one line of final counts."""
+    numbered = [(i, e) for i, e in enumerate(history, 1)
+                if e.get('module') == 'Microbiology' and e.get('status') == 'pending']
+    if not numbered:
+        print('No pending Microbiology experiments.')
+        return
+
+    pending = [e for _, e in numbered]
+    numbers = ', '.join(f"#{i}" for i, _ in numbered)
+    counts = input(f'Final bacterial counts (N) for {numbers}, comma-separated: ')
+    try:
+        final_Ns = [validate_positive_number(c) for c in counts.split(',')]
+        if len(final_Ns) != len(pending):
+            raise ValueError(f'Expected {len(pending)} counts, got {len(final_Ns)}')
+        gens, dts = generation_time_batch(
+            [e['details']['N0'] for e in pending],
+            final_Ns,
+            [e['details']['time_elapsed'] for e in pending],
+        )
+    except ValueError as e:
+        print(f'Error: {e}')
+        return
+
+    completed = now_iso()
+    update_history_entries(history, [
+        (entry, {
+            'details': dict(entry['details'], N=N, generations=g, doubling_time=dt),
+            'status': 'completed',
+            'completed_timestamp': completed,
+        })
+        for entry, N, g, dt in zip(pending, final_Ns, gens, dts)
+    ])
+    print(f'✓ {len(pending)} pending experiments finalized and saved.')
@@ -1,17 +1,103 @@
-"""Utilities: validation and constants."""
+"""Utilities: validation, JSON encoding, JSON Lines files and constants."""
+import json
+import os
+from datetime import datetime, timezone
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Micro sign (U+00B5) and Greek small mu (U+03BC) both normalize to ASCII 'u'
+_MU_TO_U = str.maketrans({'\u00b5': 'u', '\u03bc': 'u'})
 
 
 def validate_positive_number(value):
     """Validate that input is a positive number."""
     try:
         num = float(value)
-        if num < 0:
-            raise ValueError("Values must be non-negative")
-        return num
-    except ValueError as e:
-        if "Values must be non-negative" in str(e):
-            raise
-        raise ValueError("Invalid input: please enter a valid number")
+    except (TypeError, ValueError):
+        raise ValueError("Invalid input: please enter a valid number") from None
+    if num < 0:
+        raise ValueError("Values must be non-negative")
+    return num
+
+
+def normalize_unit(unit):
+    """Normalize micro prefixes (µ or μ) in a unit string to 'u'."""
+    return unit.translate(_MU_TO_U)
+
+
+def now_iso():
+    """Current UTC time as a second-resolution ISO 8601 string with offset."""
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def json_dumps(obj, pretty=False):
+    """Encode obj as compact JSON text (indented if pretty), using orjson when installed."""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if pretty else 0
+        return orjson.dumps(obj, default=str, option=option).decode('utf-8')
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=str)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def json_loads(text):
+    """Decode JSON text, using orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def iter_json_lines(lines):
+    """
+    Yield the object on each of lines, skipping blank and malformed ones.
+
+    A crash mid-append can leave a half-written last line; skipping it keeps
+    the rest of the file readable. Lines that are not JSON objects are
+    skipped too.
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            rec = json_loads(line)
+        except ValueError:
+            continue
+        if isinstance(rec, dict):
+            yield rec
+
+
+def atomic_write(path, data, fsync=False):
+    """
+    Replace path with data without ever leaving a truncated file.
+
+    The text is written to a sibling temp file, optionally fsynced, then
+    renamed over path with os.replace, which is atomic on POSIX and Windows.
+    """
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def append_json_lines(path, records, fsync=False):
+    """Append records to the JSON Lines file at path, one per line."""
+    data = ''.join(json_dumps(r) + '\n' for r in records).encode('utf-8')
+    with open(path, 'a+b') as f:
+        # Start on a fresh line if a crash left the last one unterminated
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                data = b'\n' + data
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
 
 
 # Standard concentration unit across app